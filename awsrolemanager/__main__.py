@@ -0,0 +1,3 @@
+from awsrolemanager.awsrolemanager import main
+
+main()
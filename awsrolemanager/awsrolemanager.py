@@ -1,4 +1,3 @@
-#!/usr/bin/env python3
 """
 This module is intended to help manage AWS STS credentials
 when managing multiple roles.
@@ -6,14 +5,18 @@ when managing multiple roles.
 
 import sys
 
-import argparse
 import codename
-import subprocess
-import datetime
 import json
 import os
-import prettytable
-import termcolor
+from typing import Optional
+
+_AWS_DIR = os.path.expanduser("~/.aws")
+_CREDS_PATH = os.path.join(_AWS_DIR, "credentials")
+_CONFIG_PATH = os.path.join(_AWS_DIR, "config")
+
+# Parsed configuration files keyed by path, along with the stat result
+# that was current when the file was parsed
+_CONFIG_CACHE = {}
 
 def get_account_number_from_arn(arn: str) -> str:
     """"
@@ -24,7 +27,7 @@ def get_account_number_from_arn(arn: str) -> str:
     Returns:
     An AWS account number in string format
     """
-    account_number = arn.split(':')[4]
+    account_number = arn.split(':', 5)[4]
     return account_number
 
 def get_role_name_from_arn(arn: str) -> str:
@@ -36,7 +39,8 @@ def get_role_name_from_arn(arn: str) -> str:
     Returns:
     A string containing the name of the role
     """
-    role_name = arn.split('/')[1]
+    _, _, resource = arn.partition('/')
+    role_name, _, _ = resource.partition('/')
     return role_name
 
 def get_session_name_from_arn(arn: str) -> str:
@@ -48,10 +52,95 @@ def get_session_name_from_arn(arn: str) -> str:
     Returns:
     A string containing the name of the session
     """
-    session_name = arn.split('/')[2]
+    _, _, resource = arn.partition('/')
+    _, _, resource = resource.partition('/')
+    session_name, _, _ = resource.partition('/')
     return session_name
 
-def save_credentials(sts_creds: dict) -> str:
+def _parse_assumed_role_arn(arn: str) -> tuple:
+    """
+    Gets the account number, role name and session name from an assumed
+    role ARN in a single pass
+    Parameters:
+    arn - The assumed role arn string to parse
+
+    Returns:
+    A tuple of the account number, role name and session name
+
+    Raises:
+    ValueError - If the arn is not an assumed role ARN
+    """
+    head, separator, tail = arn.partition(':assumed-role/')
+    if not separator:
+        raise ValueError(f"Not an assumed role ARN: {arn}")
+    account_number = head.rsplit(':', 1)[-1]
+    role_name, _, session_name = tail.partition('/')
+    return account_number, role_name, session_name
+
+def _stat_or_none(path: str) -> Optional[os.stat_result]:
+    """
+    Gets the stat result for a path
+    Parameters:
+    path - The path to stat
+
+    Returns:
+    The stat result, or None if the path does not exist
+    """
+    try:
+        return os.stat(path)
+    except FileNotFoundError:
+        return None
+
+def _cache_appended_section(config_file_path: str,
+                            previous_stat: Optional[os.stat_result],
+                            section_name: str, section: dict) -> None:
+    """
+    Updates the cached data for a configuration file that just had a section
+    appended to it, so the file does not need to be parsed again. If the cached
+    data was already out of date it is dropped instead.
+
+    Parameters:
+    config_file_path - A string containing the file path of the configuration
+                       file
+    previous_stat - The stat result of the file before the section was written,
+                    or None if the file did not exist
+    section_name - The name of the appended section
+    section - A dictionary containing the keys of the appended section
+    """
+    cached = _CONFIG_CACHE.pop(config_file_path, None)
+    if previous_stat is None:
+        cached_data = {}
+    elif cached is None:
+        return
+    else:
+        cached_stat, cached_data = cached
+        if (cached_stat.st_mtime_ns != previous_stat.st_mtime_ns or
+                cached_stat.st_size != previous_stat.st_size):
+            return
+
+    stat = _stat_or_none(config_file_path)
+    if stat is None:
+        return
+
+    data = dict(cached_data)
+    data[section_name] = {**cached_data.get(section_name, {}), **section}
+    _CONFIG_CACHE[config_file_path] = (stat, data)
+
+def _format_section(section_name: str, section: dict) -> str:
+    """
+    Formats a section to be appended to an AWS configuration file
+    Parameters:
+    section_name - The name of the section
+    section - A dictionary containing the keys of the section
+
+    Returns:
+    The section as a string, preceded by a blank line
+    """
+    parts = ("", f"[{section_name}]",
+             *(f"{key} = {value}" for key, value in section.items()))
+    return "\n".join(parts) + "\n"
+
+def save_credentials(sts_creds: dict, durable: bool = False) -> tuple:
     """
     Saves a set of credentials to the AWS credentials file
     and saves relevant metadata to the configuration file.
@@ -59,49 +148,60 @@ def save_credentials(sts_creds: dict) -> str:
     Parameters:
     creds - A dictionary containing the credential material required to assume
             the role
+    durable - If True, flush both files to disk before returning
 
     Returns:
-    The name of the profile
+    A tuple of the name of the profile and a dictionary containing the
+    profile's credential and configuration data
     """
     arn = sts_creds['AssumedRoleUser']['Arn']
-    account_number = get_account_number_from_arn(arn)
-    role_name = get_role_name_from_arn(arn)
-    session_name = get_session_name_from_arn(arn)
+    account_number, role_name, session_name = _parse_assumed_role_arn(arn)
     expiration = sts_creds['Credentials']['Expiration']
+    access_key_id = sts_creds['Credentials']['AccessKeyId']
+    secret_access_key = sts_creds['Credentials']['SecretAccessKey']
+    session_token = sts_creds['Credentials']['SessionToken']
 
     profile_name = codename.codename(separator='_')
 
-    if not os.path.exists(os.path.expanduser("~/.aws")):
-        os.mkdir(os.path.expanduser("~/.aws"))
+    cred_section = {
+        'aws_access_key_id': access_key_id,
+        'aws_secret_access_key': secret_access_key,
+        'aws_session_token': session_token,
+    }
+    config_section = {
+        'region': 'us-east-1',
+        'output': 'json',
+        'session_name': session_name,
+        'expiration': expiration,
+        'role_name': role_name,
+    }
 
-    with open(os.path.expanduser("~/.aws/credentials"), 'a', encoding="utf-8") as file:
-        access_key_id = sts_creds['Credentials']['AccessKeyId']
-        secret_access_key = sts_creds['Credentials']['SecretAccessKey']
-        session_token = sts_creds['Credentials']['SessionToken']
+    cred_block = _format_section(profile_name, cred_section)
+    config_block = _format_section(profile_name, config_section)
 
-        block = f"""
-[{profile_name}]
-aws_access_key_id = {access_key_id}
-aws_secret_access_key = {secret_access_key}
-aws_session_token = {session_token}
-"""
-        file.write(block)
-        file.close()
-
-    with open(os.path.expanduser("~/.aws/config"), 'a', encoding="utf-8") as file:
-
-        block = f"""
-[{profile_name}]
-region = us-east-1
-output = json
-session_name = {session_name}
-expiration = {expiration}
-role_name = {role_name}
-"""
-        file.write(block)
-        file.close()
+    if not os.path.exists(_AWS_DIR):
+        os.mkdir(_AWS_DIR)
 
-    return profile_name
+    cred_stat = _stat_or_none(_CREDS_PATH)
+    config_stat = _stat_or_none(_CONFIG_PATH)
+
+    with open(_CREDS_PATH, 'a', encoding="utf-8") as file:
+        file.write(cred_block)
+        if durable:
+            file.flush()
+            os.fsync(file.fileno())
+
+    with open(_CONFIG_PATH, 'a', encoding="utf-8") as file:
+        file.write(config_block)
+        if durable:
+            file.flush()
+            os.fsync(file.fileno())
+
+    _cache_appended_section(_CREDS_PATH, cred_stat, profile_name, cred_section)
+    _cache_appended_section(_CONFIG_PATH, config_stat, profile_name,
+                            config_section)
+
+    return profile_name, {**cred_section, **config_section}
 
 
 def parse_config_file(config_file_path: str) -> dict:
@@ -119,12 +219,9 @@ def parse_config_file(config_file_path: str) -> dict:
     return_data = {}
     try:
         with open(config_file_path, 'r', encoding="utf-8") as file:
-            text = file.read()
-            lines = text.split('\n')
-
             config_item = ''
 
-            for line in lines:
+            for line in file:
                 # Remove any whitespace
                 line = line.strip()
                 if len(line) == 0:
@@ -145,7 +242,6 @@ def parse_config_file(config_file_path: str) -> dict:
                         return_data[config_item][key.strip()] = value.strip()
 
                     except ValueError as exc:
-                        import pdb; pdb.set_trace()
                         print(f"[!] invalid line in configuration file: {line}")
                         print(str(exc))
                         return None
@@ -155,6 +251,40 @@ def parse_config_file(config_file_path: str) -> dict:
     return return_data
 
 
+def _parse_cached(config_file_path: str) -> dict:
+    """
+    Parses an AWS configuration file, reusing the previously parsed data
+    if the file has not changed since it was last read.
+
+    Parameters:
+    config_file_path - A string containing the file path of the configuration
+                       file
+
+    Returns:
+    A dictionary representing a configuration file
+    """
+    try:
+        stat = os.stat(config_file_path)
+    except FileNotFoundError:
+        _CONFIG_CACHE.pop(config_file_path, None)
+        return parse_config_file(config_file_path)
+
+    cached = _CONFIG_CACHE.get(config_file_path)
+    if cached is not None:
+        cached_stat, cached_data = cached
+        if (cached_stat.st_mtime_ns == stat.st_mtime_ns and
+                cached_stat.st_size == stat.st_size):
+            return cached_data
+
+    data = parse_config_file(config_file_path)
+    if data is not None:
+        _CONFIG_CACHE[config_file_path] = (stat, data)
+    else:
+        _CONFIG_CACHE.pop(config_file_path, None)
+
+    return data
+
+
 def parse_configuration_data() -> dict:
     """
     Reads configuration files in the .aws folder and populates
@@ -164,174 +294,47 @@ def parse_configuration_data() -> dict:
     A dictionary representing the AWS profiles
     """
 
-    config_file = os.path.expanduser("~/.aws/config")
-    creds_file = os.path.expanduser("~/.aws/credentials")
-
-    config_items = parse_config_file(config_file)
+    config_items = _parse_cached(_CONFIG_PATH)
     if not config_items:
         return None
-    cred_items = parse_config_file(creds_file)
+    cred_items = _parse_cached(_CREDS_PATH)
     if not cred_items:
         return None
 
     profiles = {}
 
     for key, value in cred_items.items():
-        if key not in config_items:
-            profiles[key] = value
-        else:
-            profiles[key] = dict(list(value.items()) + 
-                list(config_items[key].items()))
+        # value belongs to the cached credentials data, so it is copied
+        # rather than returned or updated in place
+        profile = dict(value)
+        if key in config_items:
+            profile.update(config_items[key])
+        profiles[key] = profile
 
     return profiles
 
-def get_time_difference(timestamp: str) -> int:
-    """
-    Gets the difference in seconds between UTC now and the provided timeestamp
-    Parameters:
-    timestamp - A string timestamp in the form %Y-%m-%dT%H:%M:%S
-
-    Returns:
-    An integer representing the difference in seconds
-    """
-    expire_date = datetime.datetime.strptime(timestamp, '%Y-%m-%dT%H:%M:%S%z')
-    now = datetime.datetime.now(datetime.timezone.utc)
-
-    return (expire_date - now).total_seconds()
-
-
-
-def print_table(profile_data: dict) -> list:
-    """
-    Prints all of the AWS profiles in a table format and returns the list
-    of profile names presented
-
-    Parameters:
-    profile_data - A dictionary containing all of the AWS profiles and their
-                   corresponding configuration data
-    """
-
-    table = prettytable.PrettyTable(["Index", "Name", "Role Name",
-        "Session Name", "Time Remaining"])
-    table._max_width = {"Name": 20, "Role Name": 20, "Session Name": 20,
-                        "Time Remaining": 10}
-
-    table.set_style(prettytable.DOUBLE_BORDER)
-    table.hrules = prettytable.ALL
-    i = 0
-    keys = profile_data.keys()
-    for key in keys:
-        i += 1
-        expiration = "N/A"
-        role_name = ""
-        session_name = ""
-        if 'expiration' in profile_data[key]:
-            expiration_seconds = get_time_difference(profile_data[key]['expiration'])
-            if expiration_seconds < 0:
-                expiration = f"Expired {abs(int(expiration_seconds/60))} minutes ago"
-            else:
-                color = 'green'
-                if int(expiration_seconds) < 600:
-                    color = 'yellow'
-                if int(expiration_seconds) < 60:
-                    color = 'red'
-                expiration = f"{int(expiration_seconds)} seconds"
-
-        if "role_name" in profile_data[key]:
-            role_name = profile_data[key]['role_name']
-
-        if "session_name" in profile_data[key]:
-            session_name = profile_data[key]['session_name']
-
-        table.add_row([i, key, role_name, session_name, expiration])
-
-
-    print(table)
-    return list(keys)
-
-def launch_role(profile_name: str, config_data: dict) -> None:
-    """
-    launch_role will launch a new x-terminal-emulator with the appropriate
-    environment variables set for the selected role.
-
-    Parameters:
-    profile_name - The name of the AWS profile
-    config_data - A dictionary containing all of the configuration data for
-                  the AWS profile
-    """
-    custom_env = os.environ.copy()
-
-
-    custom_env.pop('AWS_PROFILE', '')
-    custom_env.pop('AWS_DEFAULT_PROFILE', '')
-    custom_env.pop('AWS_ACCESS_KEY_ID', '')
-    custom_env.pop('AWS_SECRET_ACCESS_KEY', '')
-    custom_env.pop('AWS_SESSION_TOKEN', '')
-
-
-    custom_env['AWS_PROFILE'] = profile_name
-    #custom_env['AWS_ACCESS_KEY_ID'] = config_data['aws_access_key_id']
-    #custom_env['AWS_SECRET_ACCESS_KEY'] = config_data['aws_secret_access_key']
-    #if 'aws_session_token' in config_data:
-    #    custom_env['AWS_SESSION_TOKEN'] = config_data['aws_session_token']
-
-    subprocess.Popen('/usr/bin/gnome-terminal', env=custom_env)
-
-
-def run_ui() -> None:
-    """
-    run_UI prints the table and prompts the user to select a role to use
-    """
-    data = parse_configuration_data()
-    if not data:
-        return
-
-    keys = print_table(data)
-    number_of_roles = len(keys)
-    if number_of_roles == 0:
-        print("[*] No configured roles found")
-        return
-
-    role_number = 0
-    while role_number not in range(1, number_of_roles+1):
-        try:
-            keyboard_intput = input(f"Select a role [1 - {number_of_roles}]: ")
-        except KeyboardInterrupt:
-            print('\n')
-            return
-        try:
-            role_number = int(keyboard_intput)
-        except ValueError:
-            print("[!] Not a valid number")
-            continue
-
-        if role_number not in range(1,number_of_roles+1):
-            print(f"[!] Invalid selection. Pick a number between 1 - {number_of_roles}")
-
-    profile_name = keys[role_number-1]
-
-    launch_role(profile_name, data[profile_name])
-
 def main():
     if len(sys.argv) > 1:
-        # Parse args and follow command
+        # Parse args and follow command. argparse and the menu are only
+        # imported here so piping credentials in does not pay for them.
+        import argparse
         parser = argparse.ArgumentParser()
         parser.add_argument('-m', action='store_true')
         args = parser.parse_args()
         if args.m:
+            from awsrolemanager.ui import run_ui
             run_ui()
     else:
         try:
-            creds = sys.stdin.read()
+            creds = sys.stdin.buffer.read()
         except KeyboardInterrupt:
             sys.exit(0)
         try:
             cred_obj = json.loads(creds)
-            config_name = save_credentials(cred_obj)
+            config_name, _ = save_credentials(cred_obj)
             print(f"[*] Profile saved as {config_name}")
 
-        except json.JSONDecodeError:
-            print(f"[!] Invalid json: {creds}")
-
-if __name__ == "__main__":
-    main()
+        except (json.JSONDecodeError, UnicodeDecodeError):
+            print(f"[!] Invalid json: {creds.decode('utf-8', 'replace')}")
+        except ValueError as exc:
+            print(f"[!] Invalid credentials: {exc}")
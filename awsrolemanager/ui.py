@@ -0,0 +1,165 @@
+"""
+This module contains the interactive menu used to select a saved AWS
+profile and launch a terminal with it.
+"""
+
+import bisect
+import datetime
+import os
+import signal
+from typing import Optional
+
+import prettytable
+import termcolor
+
+from awsrolemanager.awsrolemanager import parse_configuration_data
+
+# Environment variables removed from the environment of launched terminals
+# so they do not take precedence over the selected profile
+_AWS_ENV_VARS = frozenset(('AWS_PROFILE', 'AWS_DEFAULT_PROFILE',
+                           'AWS_ACCESS_KEY_ID', 'AWS_SECRET_ACCESS_KEY',
+                           'AWS_SESSION_TOKEN'))
+
+# Remaining session seconds at which the expiration color changes, and the
+# color used below, between and above each threshold. Expired sessions fall
+# below the first threshold.
+_THRESHOLDS = (0, 60, 600)
+_COLORS = ('red', 'red', 'yellow', 'green')
+
+def get_time_difference(timestamp: str,
+                        now: Optional[datetime.datetime] = None) -> int:
+    """
+    Gets the difference in seconds between UTC now and the provided timeestamp
+    Parameters:
+    timestamp - An ISO 8601 timestamp with a UTC offset, such as
+                2030-01-01T00:00:00+00:00 or 2030-01-01T00:00:00Z
+    now - A timezone aware datetime to compare against. Defaults to the
+          current UTC time
+
+    Returns:
+    An integer representing the difference in seconds
+    """
+    # fromisoformat only accepts a trailing Z from Python 3.11 onwards
+    if timestamp.endswith('Z'):
+        timestamp = timestamp[:-1] + '+00:00'
+    expire_date = datetime.datetime.fromisoformat(timestamp)
+    if now is None:
+        now = datetime.datetime.now(datetime.timezone.utc)
+
+    return (expire_date - now).total_seconds()
+
+def get_expiration_color(seconds: int) -> str:
+    """
+    Gets the color used to display the time remaining on a session
+    Parameters:
+    seconds - The number of seconds until the session expires
+
+    Returns:
+    The name of a termcolor color
+    """
+    return _COLORS[bisect.bisect_right(_THRESHOLDS, seconds)]
+
+
+def print_table(profile_data: dict) -> list:
+    """
+    Prints all of the AWS profiles in a table format and returns the list
+    of profile names presented
+
+    Parameters:
+    profile_data - A dictionary containing all of the AWS profiles and their
+                   corresponding configuration data
+    """
+
+    table = prettytable.PrettyTable(["Index", "Name", "Role Name",
+        "Session Name", "Time Remaining"])
+    table._max_width = {"Name": 20, "Role Name": 20, "Session Name": 20,
+                        "Time Remaining": 10}
+
+    table.set_style(prettytable.DOUBLE_BORDER)
+    table.hrules = prettytable.ALL
+    i = 0
+    keys = profile_data.keys()
+    now = datetime.datetime.now(datetime.timezone.utc)
+    add_row = table.add_row
+    colored = termcolor.colored
+    for key, row in profile_data.items():
+        i += 1
+        expiration = "N/A"
+        expiration_timestamp = row.get('expiration')
+        if expiration_timestamp is not None:
+            expiration_seconds = get_time_difference(expiration_timestamp, now)
+            color = get_expiration_color(int(expiration_seconds))
+            if expiration_seconds < 0:
+                expiration = f"Expired {abs(int(expiration_seconds/60))} minutes ago"
+            else:
+                expiration = f"{int(expiration_seconds)} seconds"
+            expiration = colored(expiration, color)
+
+        role_name = row.get('role_name', '')
+        session_name = row.get('session_name', '')
+
+        add_row([i, key, role_name, session_name, expiration])
+
+
+    print(table)
+    return list(keys)
+
+def launch_role(profile_name: str, config_data: dict) -> None:
+    """
+    launch_role will launch a new x-terminal-emulator with the appropriate
+    environment variables set for the selected role.
+
+    Parameters:
+    profile_name - The name of the AWS profile
+    config_data - A dictionary containing all of the configuration data for
+                  the AWS profile
+    """
+    custom_env = {key: value for key, value in os.environ.items()
+                  if key not in _AWS_ENV_VARS}
+
+    custom_env['AWS_PROFILE'] = profile_name
+    #custom_env['AWS_ACCESS_KEY_ID'] = config_data['aws_access_key_id']
+    #custom_env['AWS_SECRET_ACCESS_KEY'] = config_data['aws_secret_access_key']
+    #if 'aws_session_token' in config_data:
+    #    custom_env['AWS_SESSION_TOKEN'] = config_data['aws_session_token']
+
+    # Python ignores SIGPIPE and SIGXFSZ, and posix_spawn would pass that on
+    # to the terminal, so reset them to their defaults like Popen does
+    os.posix_spawn('/usr/bin/gnome-terminal', ['/usr/bin/gnome-terminal'],
+                   custom_env, setsigdef=(signal.SIGPIPE, signal.SIGXFSZ))
+
+
+def run_ui() -> None:
+    """
+    run_UI prints the table and prompts the user to select a role to use
+    """
+    data = parse_configuration_data()
+    if not data:
+        return
+
+    keys = print_table(data)
+    number_of_roles = len(keys)
+    if number_of_roles == 0:
+        print("[*] No configured roles found")
+        return
+
+    while True:
+        try:
+            keyboard_intput = input(f"Select a role [1 - {number_of_roles}]: ")
+        except KeyboardInterrupt:
+            print('\n')
+            return
+        try:
+            role_number = int(keyboard_intput)
+        except ValueError:
+            print("[!] Not a valid number")
+            continue
+
+        if 1 <= role_number <= number_of_roles:
+            break
+
+        print(f"[!] Invalid selection. Pick a number between 1 - {number_of_roles}")
+
+    profile_name = keys[role_number-1]
+
+    launch_role(profile_name, data[profile_name])
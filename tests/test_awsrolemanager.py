@@ -0,0 +1,163 @@
+import contextlib
+import io
+import json
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from awsrolemanager import awsrolemanager
+
+
+class ParseConfigFileTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+
+    def parse(self, text: str) -> dict:
+        path = os.path.join(self.directory.name, "config")
+        with open(path, 'w', encoding="utf-8") as file:
+            file.write(text)
+        return awsrolemanager.parse_config_file(path)
+
+    def test_sections(self):
+        data = self.parse("# comment\n"
+                          "[default]\n"
+                          "Region = us-east-1\n"
+                          "\n"
+                          "[profile dev]\n"
+                          "aws_session_token = abc==\n")
+        self.assertEqual(data, {
+            'default': {'Region': 'us-east-1'},
+            'profile dev': {'aws_session_token': 'abc=='},
+        })
+
+    def test_keys_before_first_section_are_skipped(self):
+        data = self.parse("foo = bar\n[default]\nregion = us-east-1\n")
+        self.assertEqual(data, {'default': {'region': 'us-east-1'}})
+
+    def test_default_section_is_a_profile(self):
+        data = self.parse("[DEFAULT]\nregion = us-west-2\n"
+                          "[dev]\noutput = json\n")
+        self.assertEqual(data, {
+            'DEFAULT': {'region': 'us-west-2'},
+            'dev': {'output': 'json'},
+        })
+
+    def test_nested_keys_are_flattened(self):
+        data = self.parse("[default]\n"
+                          "s3 =\n"
+                          "    max_concurrent_requests = 20\n"
+                          "region = us-east-1\n")
+        self.assertEqual(data, {'default': {
+            's3': '',
+            'max_concurrent_requests': '20',
+            'region': 'us-east-1',
+        }})
+
+    def test_invalid_line(self):
+        self.assertIsNone(self.parse("[default]\nnot a setting\n"))
+
+    def test_missing_file(self):
+        path = os.path.join(self.directory.name, "missing")
+        self.assertEqual(awsrolemanager.parse_config_file(path), {})
+
+
+class ParseAssumedRoleArnTest(unittest.TestCase):
+
+    def test_assumed_role_arn(self):
+        arn = "arn:aws:sts::123456789012:assumed-role/Admin/alice"
+        self.assertEqual(awsrolemanager._parse_assumed_role_arn(arn),
+                         ("123456789012", "Admin", "alice"))
+
+    def test_other_arn(self):
+        with self.assertRaises(ValueError):
+            awsrolemanager._parse_assumed_role_arn(
+                "arn:aws:sts::123456789012:federated-user/bob")
+
+
+class SaveCredentialsTest(unittest.TestCase):
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        aws_dir = os.path.join(directory.name, ".aws")
+        self.creds_path = os.path.join(aws_dir, "credentials")
+        for name, value in (("_AWS_DIR", aws_dir),
+                            ("_CREDS_PATH", self.creds_path),
+                            ("_CONFIG_PATH", os.path.join(aws_dir, "config")),
+                            ("_CONFIG_CACHE", {})):
+            patcher = mock.patch.object(awsrolemanager, name, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def save(self, session_name: str) -> tuple:
+        return awsrolemanager.save_credentials({
+            'AssumedRoleUser': {
+                'Arn': "arn:aws:sts::123456789012:assumed-role/Admin/"
+                       f"{session_name}",
+            },
+            'Credentials': {
+                'AccessKeyId': "AKIA",
+                'SecretAccessKey': "secret",
+                'SessionToken': "token==",
+                'Expiration': "2030-01-01T00:00:00+00:00",
+            },
+        })
+
+    def run_main(self, stdin: bytes) -> str:
+        output = io.StringIO()
+        with mock.patch.object(awsrolemanager.sys, 'argv', ["awsrolemanager"]), \
+                mock.patch.object(awsrolemanager.sys, 'stdin',
+                                  io.TextIOWrapper(io.BytesIO(stdin))), \
+                contextlib.redirect_stdout(output):
+            awsrolemanager.main()
+        return output.getvalue()
+
+    def reparse(self) -> dict:
+        awsrolemanager._CONFIG_CACHE.clear()
+        return awsrolemanager.parse_configuration_data()
+
+    def test_returned_profile(self):
+        profile_name, profile = self.save("alice")
+        self.assertEqual(self.reparse(), {profile_name: profile})
+
+    def test_fresh_cache_is_updated(self):
+        self.save("alice")
+        awsrolemanager.parse_configuration_data()
+        self.save("bob")
+        cached = awsrolemanager.parse_configuration_data()
+        self.assertEqual(cached, self.reparse())
+
+    def test_stale_cache_is_dropped(self):
+        self.save("alice")
+        awsrolemanager.parse_configuration_data()
+        with open(self.creds_path, 'a', encoding="utf-8") as file:
+            file.write("\n[manual]\naws_access_key_id = AKIA2\n")
+        self.save("bob")
+        cached = awsrolemanager.parse_configuration_data()
+        self.assertIn('manual', cached)
+        self.assertEqual(cached, self.reparse())
+
+    def test_profiles_do_not_share_cached_data(self):
+        self.save("alice")
+        with open(self.creds_path, 'a', encoding="utf-8") as file:
+            file.write("\n[manual]\naws_access_key_id = AKIA2\n")
+        for profile in awsrolemanager.parse_configuration_data().values():
+            profile['aws_access_key_id'] = "changed"
+        for profile in awsrolemanager.parse_configuration_data().values():
+            self.assertNotEqual(profile['aws_access_key_id'], "changed")
+
+    def test_main_rejects_other_arn(self):
+        output = self.run_main(json.dumps({
+            'AssumedRoleUser': {
+                'Arn': "arn:aws:sts::123456789012:federated-user/bob",
+            },
+        }).encode())
+        self.assertTrue(output.startswith("[!] Invalid credentials: "))
+        self.assertFalse(os.path.exists(self.creds_path))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,31 @@
+import datetime
+import unittest
+
+from awsrolemanager import ui
+
+
+class GetTimeDifferenceTest(unittest.TestCase):
+
+    now = datetime.datetime(2030, 1, 1, tzinfo=datetime.timezone.utc)
+
+    def test_offset(self):
+        self.assertEqual(
+            ui.get_time_difference("2030-01-01T00:10:00+00:00", self.now), 600)
+
+    def test_zulu(self):
+        self.assertEqual(
+            ui.get_time_difference("2029-12-31T23:59:00Z", self.now), -60)
+
+
+class GetExpirationColorTest(unittest.TestCase):
+
+    def test_thresholds(self):
+        for seconds, color in ((-1, 'red'), (0, 'red'), (59, 'red'),
+                               (60, 'yellow'), (599, 'yellow'),
+                               (600, 'green')):
+            with self.subTest(seconds=seconds):
+                self.assertEqual(ui.get_expiration_color(seconds), color)
+
+
+if __name__ == "__main__":
+    unittest.main()